@@ -0,0 +1,37 @@
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+# Process-wide Session cache keyed by API token so consecutive Cloudflare
+# module invocations in one interpreter (e.g. under mitogen or a persistent
+# connection plugin) reuse the same DNS resolution and TLS connection
+# instead of re-handshaking per task.
+_SESSIONS: dict = {}
+
+
+def get_session(api_token: str):
+    """Return the cached Session for this API token, building it on first use.
+
+    requests is imported lazily so callers can turn an ImportError into
+    their own missing_required_lib failure.
+    """
+    session = _SESSIONS.get(api_token)
+    if session is not None:
+        return session
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
+    session = requests.Session()
+    session.headers.update({
+        'Authorization': f'Bearer {api_token}',
+        'Content-Type': 'application/json',
+    })
+    # Back off and retry on rate limits and transient 5xx instead of
+    # failing the whole task; retries reuse the pooled connection.
+    retry = Retry(total=5, backoff_factor=0.5,
+                  status_forcelist=(429, 500, 502, 503, 504),
+                  allowed_methods=frozenset(['GET', 'POST', 'DELETE', 'PATCH']),
+                  respect_retry_after_header=True)
+    session.mount('https://', HTTPAdapter(
+        max_retries=retry, pool_connections=4, pool_maxsize=20))
+    _SESSIONS[api_token] = session
+    return session
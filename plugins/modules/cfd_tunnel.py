@@ -2,10 +2,16 @@
 # -*- coding: utf-8 -*-
 
 from __future__ import absolute_import, division, print_function
-from typing import List, Optional
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+import json
+import os
+import time
 import traceback
 from ..module_utils.test import test_func
-from ansible.module_utils.basic import AnsibleModule
+from ..module_utils.cloudflare_session import get_session
+from ansible.module_utils.basic import AnsibleModule, missing_required_lib
 __metaclass__ = type
 
 # https://developers.cloudflare.com/api/operations/cloudflare-tunnel-list-cloudflare-tunnels
@@ -67,6 +73,23 @@ options:
     version_added: "0.0.1"
     examples:
       - "AQIDBAUGBwgBAgMEBQYHCAECAwQFBgcIAQIDBAUGBwg="
+  tunnel_id:
+    description:
+      - UUID of the tunnel.
+    details:
+      - When supplied with state=absent, the tunnel is deleted by ID without looking it up by name first.
+    type: str
+    required: false
+    version_added: "1.1.0"
+  cache_ttl:
+    description:
+      - How many seconds a tunnel lookup may be served from the in-process cache.
+    details:
+      - Set to 0 to always query the Cloudflare API.
+    type: int
+    required: false
+    default: 0
+    version_added: "1.1.0"
   state:
     description:
     - Whether the tunnel should exist or not.
@@ -120,167 +143,356 @@ EXAMPLES = '''
 '''
 
 RETURN = '''
-variable:
+tunnels:
   description: A list of Cloudflare Tunnels as JSON. See U(https://developers.cloudflare.com/api/operations/cloudflare-tunnel-list-cloudflare-tunnels).
-  returned: success and O(state=present)
+  returned: success
   type: list
 '''
 
 
-GITHUB_IMP_ERR = None
+# httpx is optional: when present, multi-page list fetches overlap on an
+# AsyncClient instead of the thread pool.
 try:
-    from github import GithubException
-    from github.Repository import Repository
-    from github.Variable import Variable
-    from github.GithubException import UnknownObjectException
-    HAS_GITHUB_PACKAGE = True
+    import httpx
+    HAS_HTTPX_PACKAGE = True
 except Exception:
-    GITHUB_IMP_ERR = traceback.format_exc()
-    HAS_GITHUB_PACKAGE = False
+    HAS_HTTPX_PACKAGE = False
+
+# ijson is optional: when present, list pages are parsed incrementally off
+# the wire instead of materializing each page before scanning it.
+try:
+    import ijson
+    HAS_IJSON_PACKAGE = True
+except Exception:
+    HAS_IJSON_PACKAGE = False
+
+# orjson is optional: its C serializer beats the stdlib's Python-level
+# object walk for request bodies.
+try:
+    import orjson
+
+    def _dumps(data):
+        return orjson.dumps(data)
+except Exception:
+    def _dumps(data):
+        return json.dumps(data).encode()
+
+CF_API_BASE = 'https://api.cloudflare.com/client/v4/accounts'
+
+# URL templates are built once here so every call site formats the same
+# shape and a future base-URL change only touches these constants.
+_TUNNELS_URL = CF_API_BASE + '/{account_id}/cfd_tunnel'
+_TUNNEL_URL = CF_API_BASE + '/{account_id}/cfd_tunnel/{tunnel_id}'
+
+# (connect, read) timeout applied to every HTTP call so a stalled edge
+# node caps the task's wall time instead of hanging it indefinitely.
+_TIMEOUT = (5, 30)
+
+# The list endpoint accepts up to 1000 items per page; asking for the
+# maximum divides the number of round-trips on large accounts by 20x
+# compared to the old per_page=50.
+_LIST_PER_PAGE = 1000
+
+# Streaming the parse only pays off on big pages; below this size the plain
+# in-memory json decode is faster than setting up an incremental parser.
+_USE_STREAMING = HAS_IJSON_PACKAGE and _LIST_PER_PAGE > 200
+
+# Short-lived cache of named lookups so repeated invocations in the same
+# process (e.g. sibling modules under a persistent interpreter) skip the
+# network. Only consulted when the cache_ttl option is > 0.
+_TUNNEL_CACHE: dict = {}
+
+# On-disk ETag cache so steady-state GETs can send If-None-Match and take a
+# bodyless 304 instead of re-downloading and re-parsing the same response.
+_ETAG_CACHE_PATH = os.path.join(
+    os.path.expanduser('~'), '.ansible', 'cfd_tunnel.etag.json')
 
 
 def testing():
     return test_func()
 
-def fetch(repo: Repository, variable_name: Optional[str] = None):
+def _check_response(response, action: str):
+    # Plain status branch instead of raise_for_status() + a separate
+    # HTTPError handler: the success path never touches the exception
+    # machinery, and the error path raises exactly once.
+    if response.status_code >= 400:
+        raise Exception(
+            f'HTTP Error while {action}: {response.status_code} - {response.text}')
 
-    results = dict(
-        changed=False,
-        variables=[]
-    )
-    instances: List[Variable] = []
+
+def _load_etag_cache():
     try:
-        existing_instances = github_repo_environment.get_variables(repo=repo)
-        print('Looping through instances')
-        for instance in existing_instances:
-            if variable_name is not None and instance.name != variable_name:
-                continue
-            instances.append(instance)
-    except UnknownObjectException:
+        with open(_ETAG_CACHE_PATH) as handle:
+            return json.load(handle)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_etag_cache(cache: dict):
+    try:
+        os.makedirs(os.path.dirname(_ETAG_CACHE_PATH), exist_ok=True)
+        with open(_ETAG_CACHE_PATH, 'w') as handle:
+            json.dump(cache, handle)
+    except OSError:
+        # The cache is best-effort; never fail the task over it.
         pass
-    print(f'Getting raw data')
-    results['variables'] = [k.raw_data for k in instances]
+
+
+def _invalidate_etag(cache_key: str):
+    cache = _load_etag_cache()
+    if cache.pop(cache_key, None) is not None:
+        _save_etag_cache(cache)
+
+
+def _conditional_get(session, url: str, params: dict, cache_key: str):
+    """GET with If-None-Match; a 304 reuses the cached body without a re-parse."""
+    cache = _load_etag_cache()
+    entry = cache.get(cache_key)
+    headers = {}
+    if entry and entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    response = session.get(url, params=params, headers=headers, timeout=_TIMEOUT)
+    if response.status_code == 304 and entry is not None:
+        return entry['body']
+    _check_response(response, 'fetching tunnel')
+    body = response.json()
+    etag = response.headers.get('ETag')
+    if etag:
+        cache[cache_key] = {'etag': etag, 'body': body}
+        _save_etag_cache(cache)
+    return body
+
+
+def _iter_page_tunnels(response):
+    """Yield tunnels from a list response, streaming the parse when it pays off."""
+    if _USE_STREAMING:
+        # response.raw is the undecoded stream; let urllib3 inflate it.
+        response.raw.decode_content = True
+        return ijson.items(response.raw, 'result.item')
+    return response.json().get('result') or []
+
+
+async def _fetch_pages_async(headers: dict, url: str, pages, per_page: int):
+    """Fetch the given list pages concurrently over a shared AsyncClient."""
+    async with httpx.AsyncClient(headers=headers, timeout=30.0) as client:
+        return await asyncio.gather(
+            *[client.get(url, params={'page': page, 'per_page': per_page}) for page in pages])
+
+
+def fetch_tunnel(session, account_id: str, name: Optional[str] = None, cache_ttl: int = 0):
+    """Fetch a single tunnel by name, or list all non-deleted tunnels when name is None.
+
+    With a name the list endpoint filters server-side, so the lookup is a
+    single one-item round-trip regardless of how many tunnels the account has.
+    """
+    url = _TUNNELS_URL.format(account_id=account_id)
+    if name is not None:
+        cache_key = (account_id, name)
+        if cache_ttl > 0:
+            entry = _TUNNEL_CACHE.get(cache_key)
+            if entry is not None and time.monotonic() - entry[0] < cache_ttl:
+                return entry[1]
+        params = {'name': name, 'is_deleted': 'false', 'per_page': 1}
+        body = _conditional_get(session, url, params, f'{account_id}:{name}')
+        tunnels = body.get('result') or []
+        tunnel = tunnels[0] if tunnels else None
+        if cache_ttl > 0:
+            _TUNNEL_CACHE[cache_key] = (time.monotonic(), tunnel)
+        return tunnel
+    # Generic list-all path: walk every page, fetching pages 2..N concurrently.
+    response = session.get(url, params={'page': 1, 'per_page': _LIST_PER_PAGE},
+                           timeout=_TIMEOUT)
+    _check_response(response, 'fetching tunnel')
+    # Parse the body once; Response.json() re-decodes the full payload on
+    # every call.
+    body = response.json()
+    first_page = body.get('result') or []
+    # Filter as items stream by instead of re-scanning the accumulated list
+    # in a second pass at the end.
+    tunnels = [tunnel for tunnel in first_page if not tunnel.get('deleted_at')]
+    pagination = body.get('result_info') or {}
+    total_pages = pagination.get('total_pages', 1)
+    if len(first_page) < _LIST_PER_PAGE:
+        # A short first page means there is nothing further to fetch even if
+        # result_info was missing or inconsistent.
+        total_pages = 1
+    if total_pages > 1:
+        pages = range(2, total_pages + 1)
+        if HAS_HTTPX_PACKAGE:
+            for response in asyncio.run(_fetch_pages_async(dict(session.headers), url, pages, _LIST_PER_PAGE)):
+                _check_response(response, 'fetching tunnel')
+                tunnels.extend(tunnel for tunnel in response.json().get('result') or []
+                               if not tunnel.get('deleted_at'))
+        else:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                futures = [executor.submit(session.get, url,
+                                           params={'page': page, 'per_page': _LIST_PER_PAGE},
+                                           stream=_USE_STREAMING,
+                                           timeout=_TIMEOUT)
+                           for page in pages]
+                for future in as_completed(futures):
+                    response = future.result()
+                    if response.status_code >= 400:
+                        for pending in futures:
+                            pending.cancel()
+                    _check_response(response, 'fetching tunnel')
+                    tunnels.extend(tunnel for tunnel in _iter_page_tunnels(response)
+                                   if not tunnel.get('deleted_at'))
+    return tunnels
+
+
+def create_tunnel(session, account_id: str, name: str, config_src: str,
+                  tunnel_secret: Optional[str] = None, check_mode: bool = False):
+    results = dict(
+        changed=True,
+        tunnels=[]
+    )
+    if check_mode:
+        results['msg'] = 'Would have created tunnel (check mode)'
+        return results
+    url = _TUNNELS_URL.format(account_id=account_id)
+    data = {'name': name, 'config_src': config_src}
+    if tunnel_secret is not None:
+        data['tunnel_secret'] = tunnel_secret
+    response = session.post(url, data=_dumps(data), timeout=_TIMEOUT)
+    _check_response(response, 'creating tunnel')
+    _TUNNEL_CACHE.pop((account_id, name), None)
+    _invalidate_etag(f'{account_id}:{name}')
+    results['tunnels'] = [response.json().get('result')]
     return results
 
 
-def create(repo: Repository, variable_name: str, variable_value: Optional[str], check_mode: bool = False):
+def update_tunnel(session, account_id: str, existing_tunnel: dict, config_src: str,
+                  tunnel_secret: Optional[str] = None, check_mode: bool = False):
     results = dict(
         changed=False,
-        variables=[]
+        tunnels=[]
     )
-    instance: Variable | None
-    raw_data: dict | None = None
-    try:
-        instance = github_repo_environment.get_variable(
-            repo, variable_name=variable_name)
-        # TODO: Evaluate whether this is still necessary. "Must access the getter to trigger the network request"
-        raw_data = instance.raw_data
-    except UnknownObjectException:
-        instance = None
-    if instance is None:
-        results['changed'] = True
-        if not check_mode:
-            instance = github_repo_environment.create_variable(repo=repo,
-                                                               variable_name=variable_name, value=variable_value)
-            raw_data = instance.raw_data
-    else:
-        if instance.value != variable_value:
-            results['changed'] = True
-            if not check_mode:
-                instance.edit(value=variable_value)
-                # Update is required to get the new values in raw_data
-                instance.update()
-                raw_data = instance.raw_data
-    results['variables'] = [raw_data] if raw_data is not None else []
+    # run_module already fetched the full tunnel object; compare against it
+    # instead of re-issuing a GET, so a converged run costs no extra I/O.
+    if existing_tunnel.get('config_src', 'local') == config_src and tunnel_secret is None:
+        results['tunnels'] = [existing_tunnel]
+        return results
+    results['changed'] = True
+    if check_mode:
+        results['msg'] = 'Would have updated tunnel (check mode)'
+        results['tunnels'] = [existing_tunnel]
+        return results
+    url = _TUNNEL_URL.format(account_id=account_id, tunnel_id=existing_tunnel['id'])
+    data = {'config_src': config_src}
+    if tunnel_secret is not None:
+        data['tunnel_secret'] = tunnel_secret
+    response = session.patch(url, data=_dumps(data), timeout=_TIMEOUT)
+    _check_response(response, 'updating tunnel')
+    _TUNNEL_CACHE.pop((account_id, existing_tunnel.get('name')), None)
+    _invalidate_etag(f'{account_id}:{existing_tunnel.get("name")}')
+    results['tunnels'] = [response.json().get('result')]
     return results
 
 
-def delete(repo: Repository, variable_name: str, check_mode: bool = False):
+def delete_tunnel(session, account_id: str, name: str, tunnel_id: Optional[str] = None,
+                  check_mode: bool = False):
     results = dict(
         changed=False,
-        variables=[]
+        tunnels=[]
     )
-    raw_data = []
-    try:
-        instance = github_repo_environment.get_variable(
-            repo=repo, variable_name=variable_name)
-        raw_data.append(instance.raw_data)
-        # Delay setting to True in case there is an exception fetching instance
-        results['changed'] = True
-        if not check_mode:
-            instance.delete()
-    except UnknownObjectException:
-        pass
-    results['variables'] = raw_data
+    if tunnel_id is None:
+        tunnel = fetch_tunnel(session, account_id, name)
+        if tunnel is None:
+            return results
+        tunnel_id = tunnel['id']
+        results['tunnels'] = [tunnel]
+    results['changed'] = True
+    if check_mode:
+        results['msg'] = 'Would have deleted tunnel (check mode)'
+        return results
+    url = _TUNNEL_URL.format(account_id=account_id, tunnel_id=tunnel_id)
+    response = session.delete(url, timeout=_TIMEOUT)
+    if response.status_code == 404:
+        # Already gone; the DELETE-by-id endpoint is idempotent for us.
+        results['changed'] = False
+        results['tunnels'] = []
+        return results
+    _check_response(response, 'deleting tunnel')
+    _TUNNEL_CACHE.pop((account_id, name), None)
+    _invalidate_etag(f'{account_id}:{name}')
     return results
 
 
-def run_module(params: dict, check_mode: bool = False):
+def run_module(params: dict, session, check_mode: bool = False):
     results = dict(
         changed=False,
-        variables=[],
+        tunnels=[],
     )
-    gh = authenticate(
-        username=params['username'], password=params['password'], access_token=params['access_token'],
-        api_url=params['api_url'])
-    target = get_target(gh=gh, organization=params['organization'])
-    repo = target.get_repo(params['name'])
-    # Uppercase variable name for accurate comparison (GitHub will uppercase) - leave as None if not set
-    variable_name: str | None = params.get('variable_name', None)
-    if variable_name is not None:
-        variable_name = variable_name.upper()
+    account_id = params['account_id']
+    name = params['name']
+    cache_ttl = params.get('cache_ttl') or 0
     if params['state'] == 'present':
-        results = create(
-            repo, variable_name, params['variable_value'], check_mode)
+        existing = fetch_tunnel(session, account_id, name, cache_ttl=cache_ttl)
+        if existing is None:
+            results = create_tunnel(
+                session, account_id, name, params['config_src'], params['tunnel_secret'], check_mode)
+        else:
+            results = update_tunnel(
+                session, account_id, existing, params['config_src'], params['tunnel_secret'], check_mode)
     elif params['state'] == 'absent':
-        results = delete(repo, variable_name, check_mode)
+        results = delete_tunnel(
+            session, account_id, name, params.get('tunnel_id'), check_mode)
     elif params['state'] == 'fetched':
-        results = fetch(repo, variable_name)
+        tunnel = fetch_tunnel(session, account_id, name, cache_ttl=cache_ttl)
+        results['tunnels'] = [tunnel] if tunnel is not None else []
     else:
         raise Exception("Invalid state")
     return results
 
 
+# Built once at import so main() does not re-allocate the spec on every
+# invocation.
+_MODULE_ARGS = dict(
+    api_token=dict(type='str', required=True, no_log=True),
+    account_id=dict(type='str', required=True),
+    name=dict(type='str', required=True),
+    config_src=dict(type='str', required=False, choices=[
+                    'local', 'cloudflare'], default='local'),
+    tunnel_secret=dict(type='str', required=False, no_log=True),
+    tunnel_id=dict(type='str', required=False),
+    cache_ttl=dict(type='int', required=False, default=0),
+    state=dict(type='str', choices=[
+               'present', 'absent', 'fetched'], default='present'),
+)
+
+
+def _build_session(module):
+    """Fetch the shared Cloudflare Session for this invocation's API token.
+
+    The Session lives in module_utils.cloudflare_session so it survives
+    across Cloudflare modules when the interpreter persists; requests is
+    still imported lazily down in get_session.
+    """
+    try:
+        return get_session(module.params['api_token'])
+    except Exception:
+        module.fail_json(msg=missing_required_lib(
+            "requests"), exception=traceback.format_exc())
+
+
 def main():
-    module_args = dict(
-        api_url=dict(type='str', required=False,
-                     default='https://api.github.com'),
-        username=dict(type='str'),
-        password=dict(type='str', no_log=True),
-        access_token=dict(type='str', no_log=True),
-        organization=dict(
-            type='str', required=False, default=None),
-        name=dict(type='str', required=True),
-        variable_name=dict(type='str', required=False),
-        variable_value=dict(type='str', required=False),
-        state=dict(type='str', choices=[
-                   'present', 'absent', 'fetched'], default='present'),
-    )
     module = AnsibleModule(
-        argument_spec=module_args,
+        argument_spec=_MODULE_ARGS,
         supports_check_mode=True,
-        required_together=[('username', 'password')],
-        required_one_of=[('username', 'access_token')],
-        mutually_exclusive=[('username', 'access_token')]
     )
 
-    if not HAS_GITHUB_PACKAGE:
-        module.fail_json(msg=missing_required_lib(
-            "PyGithub"), exception=GITHUB_IMP_ERR)
-
-    if module.params['state'] == 'present' and module.params['variable_name'] is None:
-        module.fail_json(
-            msg='When state is "present", variable_name parameter is required')
-    if module.params['state'] == 'absent' and module.params['variable_name'] is None:
-        module.fail_json(
-            msg='When state is "absent", variable_name parameter is required')
+    session = _build_session(module)
 
     try:
-        result = run_module(module.params, module.check_mode)
+        result = run_module(module.params, session, module.check_mode)
         module.exit_json(**result)
-    except GithubException as e:
-        module.fail_json(msg="Github error. {0}".format(repr(e)))
     except Exception as e:
+        # requests is already in sys.modules here; _build_session imported it.
+        import requests
+        if isinstance(e, requests.exceptions.Timeout):
+            module.fail_json(
+                msg="Timed out talking to the Cloudflare API. {0}".format(repr(e)))
         module.fail_json(msg="Unexpected error. {0}".format(repr(e)))
 
 
@@ -0,0 +1,243 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import, division, print_function
+import traceback
+from ansible.module_utils.basic import AnsibleModule, missing_required_lib
+from ..module_utils.cloudflare_session import get_session
+__metaclass__ = type
+
+# https://developers.cloudflare.com/api/operations/zone-settings-get-ssl-setting
+# https://developers.cloudflare.com/api/operations/zone-settings-change-ssl-setting
+
+DOCUMENTATION = '''
+---
+module: cloudflare_zone_settings_ssl
+short_description: Manage the SSL setting of a Cloudflare zone
+version_added: 1.1.0
+description:
+  - Manages the SSL/TLS encryption mode of a Cloudflare zone.
+attributes:
+  check_mode:
+    support: full
+  diff_mode:
+    support: none
+options:
+  api_token:
+    description:
+    - The Cloudflare API token.
+    details:
+      - See: https://developers.cloudflare.com/fundamentals/api/get-started/create-token/
+    type: str
+    required: true
+    version_added: "1.1.0"
+  zone:
+    description:
+    - Name of the Cloudflare zone.
+    type: str
+    required: true
+    version_added: "1.1.0"
+    examples:
+      - example.com
+  zone_id:
+    description:
+      - ID of the Cloudflare zone.
+    details:
+      - When supplied, the zone name lookup is skipped entirely.
+    type: str
+    required: false
+    version_added: "1.1.0"
+  value:
+    description:
+      - The SSL/TLS encryption mode to set.
+    type: str
+    required: false
+    choices: [ off, flexible, full, strict ]
+    version_added: "1.1.0"
+  state:
+    description:
+    - Whether the SSL setting should be updated or only fetched.
+    details:
+      - If present, the SSL setting will be set to the given value.
+      - If fetched, the current SSL setting will be returned.
+    type: str
+    required: false
+    choices: [ present, fetched ]
+    default: present
+    version_added: "1.1.0"
+author:
+- Andrew Dawes (@andrewjdawes)
+notes:
+- N/A
+seealso:
+- name: Cloudflare Zone Settings API reference
+  description: Complete reference of the Cloudflare Zone Settings API.
+  link: https://developers.cloudflare.com/api/operations/zone-settings-change-ssl-setting
+'''
+
+EXAMPLES = '''
+- name: Set the SSL mode of a zone
+  code_kaizen.cloudflare.cloudflare_zone_settings_ssl:
+    api_token: mytoken
+    zone: example.com
+    value: full
+    state: present
+  register: results
+
+- name: Fetch the SSL mode of a zone
+  code_kaizen.cloudflare.cloudflare_zone_settings_ssl:
+    api_token: mytoken
+    zone: example.com
+    state: fetched
+  register: results
+'''
+
+RETURN = '''
+settings:
+  description: A list with the SSL setting as JSON. See U(https://developers.cloudflare.com/api/operations/zone-settings-get-ssl-setting).
+  returned: success
+  type: list
+'''
+
+
+CF_ZONES_BASE = 'https://api.cloudflare.com/client/v4/zones'
+
+# (connect, read) timeout applied to every HTTP call so a stalled edge
+# node caps the task's wall time instead of hanging it indefinitely.
+_TIMEOUT = (5, 30)
+
+# Zone name -> id never changes within a run; cache it so repeated helpers
+# (and repeated invocations in the same process) skip the lookup round-trip.
+_ZONE_ID_CACHE: dict = {}
+
+
+def _check_response(response, action: str):
+    if response.status_code >= 400:
+        raise Exception(
+            f'HTTP Error while {action}: {response.status_code} - {response.text}')
+
+
+def _get_zone_id(session, api_token: str, zone: str):
+    cache_key = (api_token, zone)
+    if cache_key in _ZONE_ID_CACHE:
+        return _ZONE_ID_CACHE[cache_key]
+    response = session.get(CF_ZONES_BASE, params={'name': zone}, timeout=_TIMEOUT)
+    _check_response(response, 'resolving zone')
+    zones = response.json().get('result') or []
+    if not zones:
+        raise Exception(f'Zone not found: {zone}')
+    zone_id = zones[0]['id']
+    _ZONE_ID_CACHE[cache_key] = zone_id
+    return zone_id
+
+
+def fetch_ssl_settings(session, zone_id: str):
+    url = f'{CF_ZONES_BASE}/{zone_id}/settings/ssl'
+    response = session.get(url, timeout=_TIMEOUT)
+    _check_response(response, 'fetching SSL settings')
+    return response.json().get('result') or {}
+
+
+def set_zone_settings(session, zone_id: str, items: list, check_mode: bool = False):
+    """Write multiple zone settings in one bulk PATCH.
+
+    items is a list of {'id': ..., 'value': ...} dicts; settings already at
+    their desired value are left out of the PATCH body.
+    """
+    results = dict(
+        changed=False,
+        settings=[]
+    )
+    url = f'{CF_ZONES_BASE}/{zone_id}/settings'
+    response = session.get(url, timeout=_TIMEOUT)
+    _check_response(response, 'fetching zone settings')
+    current = {setting.get('id'): setting
+               for setting in response.json().get('result') or []}
+    pending = [item for item in items
+               if current.get(item['id'], {}).get('value') != item['value']]
+    results['settings'] = [current[item['id']]
+                           for item in items if item['id'] in current]
+    if not pending:
+        return results
+    results['changed'] = True
+    if check_mode:
+        results['msg'] = 'Would have updated zone settings (check mode)'
+        return results
+    response = session.patch(url, json={'items': pending}, timeout=_TIMEOUT)
+    _check_response(response, 'updating zone settings')
+    results['settings'] = response.json().get('result') or []
+    return results
+
+
+def set_ssl_settings(session, zone_id: str, value: str, check_mode: bool = False):
+    # Thin wrapper kept for this module's single-setting surface.
+    return set_zone_settings(
+        session, zone_id, [{'id': 'ssl', 'value': value}], check_mode)
+
+
+def run_module(params: dict, session, check_mode: bool = False):
+    results = dict(
+        changed=False,
+        settings=[],
+    )
+    api_token = params['api_token']
+    zone_id = params['zone_id'] or _get_zone_id(
+        session, api_token, params['zone'])
+    if params['state'] == 'present':
+        results = set_ssl_settings(
+            session, zone_id, params['value'], check_mode)
+    elif params['state'] == 'fetched':
+        results['settings'] = [fetch_ssl_settings(session, zone_id)]
+    else:
+        raise Exception("Invalid state")
+    return results
+
+
+_MODULE_ARGS = dict(
+    api_token=dict(type='str', required=True, no_log=True),
+    zone=dict(type='str', required=True),
+    zone_id=dict(type='str', required=False),
+    value=dict(type='str', required=False, choices=[
+               'off', 'flexible', 'full', 'strict']),
+    state=dict(type='str', choices=[
+               'present', 'fetched'], default='present'),
+)
+
+
+def _build_session(module):
+    """Fetch the shared Cloudflare Session for this invocation's API token.
+
+    The Session lives in module_utils.cloudflare_session so it survives
+    across Cloudflare modules when the interpreter persists; requests is
+    still imported lazily down in get_session.
+    """
+    try:
+        return get_session(module.params['api_token'])
+    except Exception:
+        module.fail_json(msg=missing_required_lib(
+            "requests"), exception=traceback.format_exc())
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=_MODULE_ARGS,
+        supports_check_mode=True,
+        required_if=[('state', 'present', ('value',))],
+    )
+
+    session = _build_session(module)
+
+    try:
+        result = run_module(module.params, session, module.check_mode)
+        module.exit_json(**result)
+    except Exception as e:
+        # requests is already in sys.modules here; _build_session imported it.
+        import requests
+        if isinstance(e, requests.exceptions.Timeout):
+            module.fail_json(
+                msg="Timed out talking to the Cloudflare API. {0}".format(repr(e)))
+        module.fail_json(msg="Unexpected error. {0}".format(repr(e)))
+
+
+if __name__ == '__main__':
+    main()